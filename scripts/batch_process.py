@@ -3,7 +3,7 @@
 Batch process all chapters in a book.
 
 Usage:
-    python3 scripts/batch_process.py <book_id> <book_title> [start_ch] [end_ch]
+    python3 scripts/batch_process.py <book_id> <book_title> [start_ch] [end_ch] [--jobs N]
 
 Examples:
     # Process all chapters 01-10
@@ -14,13 +14,21 @@ Examples:
 
     # Process all chapters found in input/my-book/
     python3 scripts/batch_process.py my-book "My Book Title"
+
+    # Process up to 4 chapters at a time
+    python3 scripts/batch_process.py my-book "My Book Title" --jobs 4
 """
 
 import os
 import sys
 import subprocess
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
 
+# Serializes console output so each chapter's log is printed as one block.
+_print_lock = threading.Lock()
+
 
 def find_chapters(book_id: str) -> list[int]:
     """Find all chapter files in input/<book_id>/ and return their numbers."""
@@ -30,11 +38,18 @@ def find_chapters(book_id: str) -> list[int]:
         print(f"❌ Input directory not found: {input_dir}")
         return []
 
+    with os.scandir(input_dir) as entries:
+        names = sorted(
+            e.name
+            for e in entries
+            if e.name.startswith("chapter-") and e.name.endswith(".txt") and e.is_file()
+        )
+
     chapters = []
-    for file in sorted(input_dir.glob("chapter-*.txt")):
+    for name in names:
         try:
             # Extract chapter number from filename (e.g., "chapter-01.txt" -> 1)
-            ch_num = int(file.stem.split("-")[1])
+            ch_num = int(name[: -len(".txt")].split("-")[1])
             chapters.append(ch_num)
         except (ValueError, IndexError):
             continue
@@ -42,10 +57,16 @@ def find_chapters(book_id: str) -> list[int]:
     return chapters
 
 
-def process_chapter(book_id: str, book_title: str, ch_num: int) -> bool:
-    """Process a single chapter using make."""
+def process_chapter(
+    book_id: str, book_title: str, ch_num: int, live: bool = False
+) -> bool:
+    """Process a single chapter using make.
+
+    The child's output is buffered and printed in one piece once it exits,
+    so logs from chapters running side by side do not interleave. With
+    `live` (one chapter at a time) it streams straight to the console.
+    """
     ch_num_str = f"{ch_num:02d}"
-    print(f"\n📖 Processing chapter {ch_num_str}...", flush=True)
 
     cmd = [
         "make",
@@ -55,30 +76,87 @@ def process_chapter(book_id: str, book_title: str, ch_num: int) -> bool:
         "chapter-all",
     ]
 
-    result = subprocess.run(cmd, capture_output=False)
+    if live:
+        with _print_lock:
+            print(f"\n📖 Chapter {ch_num_str}:", flush=True)
+        return subprocess.run(cmd).returncode == 0
+
+    result = subprocess.run(
+        cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True
+    )
+    with _print_lock:
+        print(f"\n📖 Chapter {ch_num_str}:")
+        print(result.stdout, end="", flush=True)
     return result.returncode == 0
 
 
+def pop_jobs_flag(argv: list[str]) -> tuple[list[str], int | None] | None:
+    """
+    Remove `--jobs N` / `--jobs=N` from argv and return (argv, jobs).
+    Returns None when the value is missing or not a positive integer.
+    """
+    args = []
+    jobs = None
+    i = 0
+    while i < len(argv):
+        arg = argv[i]
+        if arg == "--jobs" or arg.startswith("--jobs="):
+            if arg == "--jobs":
+                i += 1
+                if i == len(argv):
+                    return None
+                value = argv[i]
+            else:
+                value = arg.split("=", 1)[1]
+            try:
+                jobs = int(value)
+            except ValueError:
+                return None
+            if jobs < 1:
+                return None
+        else:
+            args.append(arg)
+        i += 1
+    return args, jobs
+
+
+def default_jobs(num_chapters: int) -> int:
+    """Pick a worker count: one per CPU, capped at the number of chapters."""
+    return min(num_chapters, os.cpu_count() or 1)
+
+
+def print_usage_and_exit():
+    print(
+        "Usage: batch_process.py <book_id> <book_title> [start_ch] [end_ch] [--jobs N]"
+    )
+    print("")
+    print("Examples:")
+    print('  python3 scripts/batch_process.py my-book "My Book Title"')
+    print('  python3 scripts/batch_process.py my-book "My Book Title" 01 10')
+    print('  python3 scripts/batch_process.py my-book "My Book Title" 05 15')
+    print('  python3 scripts/batch_process.py my-book "My Book Title" --jobs 4')
+    sys.exit(1)
+
+
 def main():
-    if len(sys.argv) < 3:
-        print("Usage: batch_process.py <book_id> <book_title> [start_ch] [end_ch]")
-        print("")
-        print("Examples:")
-        print('  python3 scripts/batch_process.py my-book "My Book Title"')
-        print('  python3 scripts/batch_process.py my-book "My Book Title" 01 10')
-        print('  python3 scripts/batch_process.py my-book "My Book Title" 05 15')
-        sys.exit(1)
+    parsed = pop_jobs_flag(sys.argv)
+    if parsed is None:
+        print_usage_and_exit()
+    argv, jobs = parsed
+
+    if len(argv) < 3:
+        print_usage_and_exit()
 
-    book_id = sys.argv[1]
-    book_title = sys.argv[2]
+    book_id = argv[1]
+    book_title = argv[2]
 
     # Determine chapter range
-    if len(sys.argv) == 5:
+    if len(argv) == 5:
         # User specified start and end
-        start_ch = int(sys.argv[3])
-        end_ch = int(sys.argv[4])
+        start_ch = int(argv[3])
+        end_ch = int(argv[4])
         chapters = list(range(start_ch, end_ch + 1))
-    elif len(sys.argv) == 3:
+    elif len(argv) == 3:
         # Auto-detect from filesystem
         chapters = find_chapters(book_id)
         if not chapters:
@@ -91,18 +169,49 @@ def main():
     print(f"📚 Batch Processing: {book_title}")
     print(f"📁 Book ID: {book_id}")
     print(f"📋 Chapters: {chapters[0]:02d} - {chapters[-1]:02d}")
+    if jobs is None:
+        jobs = default_jobs(len(chapters))
+    jobs = max(1, min(jobs, len(chapters)))
+
     print(f"📊 Total chapters: {len(chapters)}")
+    print(f"⚙️  Parallel jobs: {jobs}")
     print("-" * 50)
 
     success_count = 0
     failed_chapters = []
 
-    for i, ch_num in enumerate(chapters, 1):
-        print(f"[{i}/{len(chapters)}]", end=" ")
-        if process_chapter(book_id, book_title, ch_num):
-            success_count += 1
+    # Each chapter is an independent `make chapter-all` subprocess. Threads are
+    # enough to run them side by side: they only wait on the children, so there
+    # is no Python work to spread across processes.
+    tasks = [(book_id, book_title, ch_num) for ch_num in chapters]
+    with ThreadPoolExecutor(max_workers=jobs) as ex:
+        if jobs == 1:
+            # Submit lazily so each chapter starts only after the previous one
+            # is reported, keeping the live output in order.
+            futures = (ex.submit(process_chapter, *task, live=True) for task in tasks)
+            finished = zip(chapters, futures)
         else:
-            failed_chapters.append(f"{ch_num:02d}")
+            futures = {ex.submit(process_chapter, *task): task[2] for task in tasks}
+            finished = ((futures[f], f) for f in as_completed(futures))
+        for i, (ch_num, future) in enumerate(finished, 1):
+            try:
+                ok = future.result()
+            except Exception as e:
+                with _print_lock:
+                    print(f"❌ Chapter {ch_num:02d} raised: {e}", flush=True)
+                ok = False
+            with _print_lock:
+                print(
+                    f"[{i}/{len(chapters)}] Chapter {ch_num:02d} "
+                    f"{'done' if ok else 'FAILED'}",
+                    flush=True,
+                )
+            if ok:
+                success_count += 1
+            else:
+                failed_chapters.append(f"{ch_num:02d}")
+
+    failed_chapters.sort()
 
     print("\n" + "-" * 50)
     print(f"✅ Completed: {success_count}/{len(chapters)} chapters")
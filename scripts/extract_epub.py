@@ -15,18 +15,33 @@ Examples:
 
 import sys
 import re
+import heapq
+import multiprocessing as mp
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from html.parser import HTMLParser
 
 try:
     import ebooklib
     from ebooklib import epub
-    from bs4 import BeautifulSoup
 except ImportError:
     print("❌ Required packages not found. Install them with:")
-    print("   pip install ebooklib beautifulsoup4")
+    print("   pip install ebooklib selectolax")
     sys.exit(1)
 
+# Prefer selectolax's C-backed Lexbor parser; BeautifulSoup is much slower
+# but still accepted when it is what's installed.
+try:
+    from selectolax.lexbor import LexborHTMLParser
+except ImportError:
+    LexborHTMLParser = None
+    try:
+        from bs4 import BeautifulSoup
+    except ImportError:
+        print("❌ Required packages not found. Install them with:")
+        print("   pip install ebooklib selectolax")
+        sys.exit(1)
+
 
 class TextExtractor(HTMLParser):
     """Extract plain text from HTML."""
@@ -54,15 +69,25 @@ class TextExtractor(HTMLParser):
         return "\n".join(self.text)
 
 
+def _html_to_raw_text(html_content: str) -> str:
+    """Strip script/style and return the document text, one node per line."""
+    if LexborHTMLParser is not None:
+        tree = LexborHTMLParser(html_content)
+        for node in tree.css("script, style"):
+            node.decompose()
+        root = tree.root
+        return root.text(separator="\n") if root is not None else ""
+
+    soup = BeautifulSoup(html_content, "html.parser")
+    for tag in soup(["script", "style"]):
+        tag.decompose()
+    return soup.get_text(separator="\n")
+
+
 def extract_text_from_html(html_content: str) -> str:
     """Extract plain text from HTML content."""
     try:
-        soup = BeautifulSoup(html_content, "html.parser")
-        # Remove script and style tags
-        for tag in soup(["script", "style"]):
-            tag.decompose()
-        # Get text
-        text = soup.get_text(separator="\n")
+        text = _html_to_raw_text(html_content)
         # Clean up whitespace
         lines = [line.strip() for line in text.split("\n")]
         text = "\n".join(line for line in lines if line)
@@ -74,10 +99,89 @@ def extract_text_from_html(html_content: str) -> str:
         return text
 
 
-def get_epub_chapters(epub_path: Path) -> list[tuple[str, str]]:
+def _parse_one(doc: tuple[str, str]) -> tuple[str, str, int]:
+    """Parse a (title, html) document into (title, text, word_count)."""
+    title, html = doc
+    text = extract_text_from_html(html)
+    return (title, text, len(text.split()))
+
+
+def _pool_context():
+    """Fork on Linux to skip re-importing this module in every worker."""
+    if sys.platform.startswith("linux"):
+        return mp.get_context("fork")
+    return mp.get_context("spawn")
+
+
+def _parse_documents(docs: list[tuple[str, str]]) -> list[tuple[str, str, int]]:
+    """Parse each (title, html) document once into (title, text, word_count).
+
+    Documents are independent, so they are parsed across a process pool;
+    results come back in input order.
+    """
+    processes = min(len(docs), mp.cpu_count())
+    if processes < 2:
+        return [_parse_one(doc) for doc in docs]
+
+    with _pool_context().Pool(processes) as pool:
+        return list(pool.imap(_parse_one, docs))
+
+
+# Titles containing any of these mark front/back matter.
+FRONT_BACK_MATTER_TITLES = [
+    "copyright",
+    "inside front cover",
+    "inside back cover",
+    "front matter",
+    "back matter",
+    "brief contents",
+    "contents",
+    "table of contents",
+    "acknowledgments",
+    "acknowledgements",
+    "preface",
+    "foreword",
+    "index",
+    "about the author",
+    "references",
+    "glossary",
+]
+
+# Phrases in the opening text that mark front/back matter.
+FRONT_BACK_MATTER_HINTS = [
+    "all rights reserved",
+    "isbn",
+    "no part of this",
+    "printed in",
+    "copyright",
+    "table of contents",
+    "index",
+]
+
+
+def _is_front_or_back_matter(title: str, text: str) -> bool:
+    """Filter front/back matter using title and early content hints."""
+    t = (title or "").strip().lower()
+    if any(kw in t for kw in FRONT_BACK_MATTER_TITLES):
+        return True
+    sample = text[:500].lower()
+    return any(kw in sample for kw in FRONT_BACK_MATTER_HINTS)
+
+
+def _longest_documents(
+    documents: list[tuple[str, str, int]], n: int
+) -> list[tuple[str, str, int]]:
+    """The n documents with the most words, longest first."""
+    return heapq.nlargest(n, documents, key=lambda d: (d[2], d[0], d[1]))
+
+
+def get_epub_chapters(epub_path: Path) -> list[tuple[str, str, int]]:
     """Extract chapters from EPUB file, filtering front/back matter.
 
-    Returns list of (chapter_title, html_content) tuples.
+    Each candidate document's HTML is parsed and scored exactly once; the
+    filtering and fallback stages only select from those results.
+
+    Returns list of (chapter_title, text_content, word_count) tuples.
     """
     try:
         book = epub.read_epub(str(epub_path))
@@ -102,80 +206,26 @@ def get_epub_chapters(epub_path: Path) -> list[tuple[str, str]]:
     if not chapters:
         chapters = [(t, h) for t, h, _ in all_docs]
 
-    # Filter front/back matter using title and early content hints
-    def is_front_or_back_matter(title: str, html: str) -> bool:
-        t = (title or "").strip().lower()
-        sample = extract_text_from_html(html)[:500].lower()
-        keywords = [
-            "copyright",
-            "inside front cover",
-            "inside back cover",
-            "front matter",
-            "back matter",
-            "brief contents",
-            "contents",
-            "table of contents",
-            "acknowledgments",
-            "acknowledgements",
-            "preface",
-            "foreword",
-            "index",
-            "about the author",
-            "references",
-            "glossary",
-        ]
-        for kw in keywords:
-            # Exact title match or title contains the keyword
-            if t == kw or kw in t:
-                return True
-        content_hints = [
-            "all rights reserved",
-            "isbn",
-            "no part of this",
-            "printed in",
-            "copyright",
-            "table of contents",
-            "index",
-        ]
-        for kw in content_hints:
-            if kw in sample:
-                return True
-        return False
-
-    filtered = []
-    for title, html in chapters:
-        if is_front_or_back_matter(title, html):
-            continue
-        text_preview = extract_text_from_html(html)
-        if len(text_preview.split()) < 200:
-            # Skip very short sections
-            continue
-        filtered.append((title, html))
+    documents = _parse_documents(chapters)
 
-    # If filtering removes everything, fall back to longest documents.
+    # Score every document once; the stages below only select from these.
+    flagged = [_is_front_or_back_matter(title, text) for title, text, _ in documents]
+
+    # Skip front/back matter and very short sections
+    filtered = [
+        doc for doc, fbm in zip(documents, flagged) if not fbm and doc[2] >= 200
+    ]
     if filtered:
         return filtered
 
+    # If filtering removes everything, fall back to longest documents.
     # Secondary fallback: pick top 10 longest documents that are not flagged by keywords.
-    scored = []
-    for title, html in chapters:
-        text_preview = extract_text_from_html(html)
-        words = len(text_preview.split())
-        if is_front_or_back_matter(title, html):
-            continue
-        scored.append((words, title, html))
-    scored.sort(reverse=True)
-
-    if scored:
-        return [(t, h) for _, t, h in scored[:10]]
+    unflagged = [doc for doc, fbm in zip(documents, flagged) if not fbm]
+    if unflagged:
+        return _longest_documents(unflagged, 10)
 
     # Last resort: take top 10 longest regardless of keywords to avoid empty output
-    longest = []
-    for title, html in chapters:
-        words = len(extract_text_from_html(html).split())
-        longest.append((words, title, html))
-    longest.sort(reverse=True)
-    return [(t, h) for _, t, h in longest[:10]]
+    return _longest_documents(documents, 10)
 
 
 def _flatten_toc_items(book, items):
@@ -232,6 +282,27 @@ def sanitize_title(title: str) -> str:
     return title if title else "Untitled"
 
 
+def _write_one(file: tuple[Path, str]) -> None:
+    ch_file, text_content = file
+    ch_file.write_text(text_content, encoding="utf-8")
+
+
+def write_chapter_files(files: list[tuple[Path, str]]) -> None:
+    """Write every planned (path, text) chapter file in one batch.
+
+    Writes release the GIL, so a thread pool overlaps them; this helps most
+    on spinning disks and network filesystems.
+    """
+    if len(files) < 2:
+        for file in files:
+            _write_one(file)
+        return
+
+    with ThreadPoolExecutor(max_workers=min(16, len(files))) as ex:
+        for _ in ex.map(_write_one, files):
+            pass
+
+
 def main():
     if len(sys.argv) < 3:
         print("Usage: extract_epub.py <epub_path> <book_id>")
@@ -265,26 +336,27 @@ def main():
     output_dir = Path("input") / book_id
     output_dir.mkdir(parents=True, exist_ok=True)
 
-    # Write chapter files (renumber starting at 01 for first real content)
-    for i, (title, html_content) in enumerate(chapters, 1):
+    # Plan chapter files (renumber starting at 01 for first real content)
+    pending_writes = []
+    progress = []
+    for i, (title, text_content, word_count) in enumerate(chapters, 1):
         ch_num = f"{i:02d}"
         ch_title = sanitize_title(title)
 
-        # Extract text from HTML
-        text_content = extract_text_from_html(html_content)
-
         # Skip very short chapters (likely navigation/metadata)
         if len(text_content.strip()) < 100:
-            print(f"   ⏭️  Skipping chapter {ch_num} (too short): {ch_title}")
+            progress.append(f"   ⏭️  Skipping chapter {ch_num} (too short): {ch_title}")
             continue
 
-        # Write chapter file
         ch_file = output_dir / f"chapter-{ch_num}.txt"
-        ch_file.write_text(text_content, encoding="utf-8")
+        pending_writes.append((ch_file, text_content))
+        progress.append(f"   ✅ Chapter {ch_num}: {ch_title} ({word_count} words)")
+
+    write_chapter_files(pending_writes)
 
-        # Show progress
-        word_count = len(text_content.split())
-        print(f"   ✅ Chapter {ch_num}: {ch_title} ({word_count} words)")
+    # Show progress
+    for line in progress:
+        print(line)
 
     print("-" * 50)
     print(f"✅ Extracted chapters to: {output_dir}/")
@@ -1,33 +1,104 @@
 #!/usr/bin/env python3
+import json
+import os
+import re
 import sys
 from pathlib import Path
 
+# Titles parsed on earlier runs, one file per book, keyed by real path and
+# invalidated when the file's mtime or size changes.
+TITLE_CACHE_DIR = Path(".scribestack_cache")
+
+# The title sits in the first few lines; only this much of each file is read.
+FRONTMATTER_READ_BYTES = 4096
+
+# Frontmatter block: from the first `---` line to the next (or to the end of
+# the window when it is not closed there).
+_FRONTMATTER_RE = re.compile(
+    r"^[ \t]*---[ \t\r]*$(.*?)(?:^[ \t]*---[ \t\r]*$|\Z)", re.M | re.S
+)
+_TITLE_RE = re.compile(r"^title:(.*)$", re.M)
+
 
 def parse_title_from_frontmatter(path: Path) -> str:
     """
     Read a Markdown file and pull the `title:` field from frontmatter.
+    Only the first FRONTMATTER_READ_BYTES bytes are read, so the note body
+    is never loaded.
     Fallback: use the filename stem.
     """
     try:
-        lines = path.read_text(encoding="utf-8").splitlines()
+        with path.open("rb") as f:
+            head = f.read(FRONTMATTER_READ_BYTES).decode("utf-8", "ignore")
+    except FileNotFoundError:
+        return path.stem
+
+    frontmatter = _FRONTMATTER_RE.search(head)
+    if not frontmatter:
+        return path.stem
+    match = _TITLE_RE.search(frontmatter.group(1))
+    if not match:
+        return path.stem
+
+    # title: "Something"
+    value = match.group(1).strip()
+    if value.startswith('"') and value.endswith('"'):
+        value = value[1:-1]
+    return value
+
+
+def list_markdown_files(directory: Path) -> list[Path]:
+    """Sorted .md files directly inside directory (one scandir, no per-entry stat)."""
+    with os.scandir(directory) as entries:
+        names = sorted(
+            e.name for e in entries if e.name.endswith(".md") and e.is_file()
+        )
+    return [directory / name for name in names]
+
+
+def title_cache_path(book_id: str) -> Path:
+    return TITLE_CACHE_DIR / f"titles-{book_id}.json"
+
+
+def load_title_cache(cache_path: Path) -> dict:
+    try:
+        cache = json.loads(cache_path.read_text(encoding="utf-8"))
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+    return cache if isinstance(cache, dict) else {}
+
+
+def save_title_cache(cache: dict, cache_path: Path) -> None:
+    cache_path.parent.mkdir(parents=True, exist_ok=True)
+    cache_path.write_text(json.dumps(cache), encoding="utf-8")
+
+
+def cached_title(path: Path, cache: dict, seen: dict) -> str:
+    """
+    parse_title_from_frontmatter, skipping files unchanged since last run.
+    Looks up `cache` (last run) and records the entry in `seen` (this run),
+    so saving `seen` drops entries for files that no longer exist.
+    """
+    try:
+        st = path.stat()
     except FileNotFoundError:
         return path.stem
 
-    in_frontmatter = False
-    for line in lines:
-        if line.strip() == "---":
-            if not in_frontmatter:
-                in_frontmatter = True
-            else:
-                break
-            continue
-        if in_frontmatter and line.startswith("title:"):
-            # title: "Something"
-            value = line.split(":", 1)[1].strip()
-            if value.startswith('"') and value.endswith('"'):
-                value = value[1:-1]
-            return value
-    return path.stem
+    key = os.path.realpath(path)
+    entry = cache.get(key)
+    # Anything that is not a well-formed, current entry is a miss
+    if (
+        isinstance(entry, dict)
+        and entry.get("mtime_ns") == st.st_mtime_ns
+        and entry.get("size") == st.st_size
+        and isinstance(entry.get("title"), str)
+    ):
+        seen[key] = entry
+        return entry["title"]
+
+    title = parse_title_from_frontmatter(path)
+    seen[key] = {"mtime_ns": st.st_mtime_ns, "size": st.st_size, "title": title}
+    return title
 
 
 def main():
@@ -44,8 +115,11 @@ def main():
         print(f"No chapters directory found for book_id={book_id} at {chapter_dir}")
         sys.exit(1)
 
-    chapters = sorted(chapter_dir.glob("*.md"))
-    atomics = sorted(atomic_dir.glob("*.md")) if atomic_dir.exists() else []
+    chapters = list_markdown_files(chapter_dir)
+    atomics = list_markdown_files(atomic_dir) if atomic_dir.exists() else []
+    cache_path = title_cache_path(book_id)
+    title_cache = load_title_cache(cache_path)
+    seen_titles = {}
 
     lines = []
     lines.append("---")
@@ -60,7 +134,7 @@ def main():
     lines.append("# Chapters")
     for ch in chapters:
         note_name = ch.stem  # filename without .md
-        display_title = parse_title_from_frontmatter(ch)
+        display_title = cached_title(ch, title_cache, seen_titles)
         lines.append(f"- [[{note_name}|{display_title}]]")
     lines.append("")
 
@@ -68,7 +142,7 @@ def main():
         lines.append("# Atomic Notes")
         for an in atomics:
             note_name = an.stem
-            display_title = parse_title_from_frontmatter(an)
+            display_title = cached_title(an, title_cache, seen_titles)
             lines.append(f"- [[{note_name}|{display_title}]]")
         lines.append("")
 
@@ -84,6 +158,7 @@ def main():
 
     index_path = out_base / "index.md"
     index_path.write_text("\n".join(lines), encoding="utf-8")
+    save_title_cache(seen_titles, cache_path)
     print(f"Wrote book index: {index_path}")
 
 
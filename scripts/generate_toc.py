@@ -13,15 +13,20 @@ Examples:
 """
 
 import json
+import os
 import sys
 from pathlib import Path
 from datetime import datetime
 
+# Shared with the note renderer so TOC links always match the note filenames
+from render_markdown import load_json
+from render_markdown import sanitize_filename as slugify
+
 
 def extract_chapter_info(json_file: Path) -> dict | None:
     """Extract chapter info from intermediate JSON file."""
     try:
-        data = json.loads(json_file.read_text(encoding="utf-8"))
+        data = load_json(json_file)
         return {
             "number": data.get("chapter_number"),
             "title": data.get("chapter_title"),
@@ -36,7 +41,7 @@ def sanitize_filename(s: str | None) -> str:
     """Turn a title into a safe filename slug. Falls back when title missing."""
     if not s:
         return "untitled"
-    return "".join(c.lower() if c.isalnum() else "-" for c in s).strip("-")
+    return slugify(s)
 
 
 def generate_toc(book_id: str, book_title: str, output_dir: Path) -> bool:
@@ -48,7 +53,15 @@ def generate_toc(book_id: str, book_title: str, output_dir: Path) -> bool:
         return False
 
     # Find all chapter JSON files
-    chapter_files = sorted(intermediate_dir.glob("chapter-*.json"))
+    with os.scandir(intermediate_dir) as entries:
+        names = sorted(
+            e.name
+            for e in entries
+            if e.name.startswith("chapter-")
+            and e.name.endswith(".json")
+            and e.is_file()
+        )
+    chapter_files = [intermediate_dir / name for name in names]
     if not chapter_files:
         print(f"❌ No chapter files found in {intermediate_dir}")
         return False
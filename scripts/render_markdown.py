@@ -1,14 +1,73 @@
 #!/usr/bin/env python3
 import json
+import os
 import sys
 import re
+import itertools
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from datetime import datetime
 
+try:
+    import ahocorasick
+except ImportError:
+    # Optional accelerator; linking falls back to a regex alternation.
+    ahocorasick = None
+
+try:
+    import orjson
+except ImportError:
+    # Optional accelerator; falls back to the stdlib json module.
+    orjson = None
+
+# Terms shorter than this are never linked (avoids linking every tiny word),
+# so text shorter than this can be returned untouched.
+MIN_LINK_TERM_LENGTH = 3
+
+
+class _SlugTable(dict):
+    """
+    str.translate table for slugs: alphanumerics lowercased, everything else
+    "-". Entries are filled in on first sight of each character, so any
+    Unicode input is handled and repeat characters are a C-level lookup.
+    """
+
+    def __missing__(self, codepoint: int) -> str:
+        c = chr(codepoint)
+        value = c.lower() if c.isalnum() else "-"
+        self[codepoint] = value
+        return value
+
+
+_SLUG_TABLE = _SlugTable()
+
+
+def load_json(path: Path):
+    """Parse a JSON file; orjson parses the raw bytes when it is installed."""
+    if orjson is not None:
+        return orjson.loads(path.read_bytes())
+    return json.loads(path.read_text(encoding="utf-8"))
+
 
 def sanitize_filename(s: str) -> str:
     """Turn a title/id into a safe Obsidian filename slug."""
-    return "".join(c.lower() if c.isalnum() else "-" for c in s).strip("-")
+    return s.translate(_SLUG_TABLE).strip("-")
+
+
+def _casefold_same_length(text: str) -> str:
+    """
+    Casefold text without changing its length, so offsets found in the
+    result apply to text. Characters that casefold to several characters
+    (e.g. "ß", "İ", "ﬁ") are left as they are.
+
+    This is also the atomic_index key of a name: folding names and text the
+    same way means a term always matches its own spelling.
+    """
+    folded = text.casefold()
+    if len(folded) == len(text):
+        return folded
+    return "".join(c if len(c.casefold()) != 1 else c.casefold() for c in text)
 
 
 def build_atomic_index(atomic_notes):
@@ -19,6 +78,8 @@ def build_atomic_index(atomic_notes):
       - each related_term string -> slug
 
     So that we can link by human names like "CTO" or "First 100 Days".
+    Keys are folded with _casefold_same_length, so "CTO" and "cto" share one
+    entry; look names up the same way.
     """
     index = {}
     for note in atomic_notes:
@@ -28,149 +89,216 @@ def build_atomic_index(atomic_notes):
         related_terms = note.get("related_terms", [])
 
         if note_id:
-            index[note_id] = slug
+            index[_casefold_same_length(note_id)] = slug
         if title:
-            index[title] = slug
+            index[_casefold_same_length(title)] = slug
 
         for rt in related_terms:
             if rt:
-                index[rt] = slug
+                index[_casefold_same_length(rt)] = slug
 
     return index
 
 
-def link_text_with_atomic_terms(text: str, atomic_index: dict) -> str:
+def compile_atomic_pattern(atomic_index: dict):
     """
-    Given a block of text and an atomic_index mapping
-      name_or_id_or_related_term -> slug
-    wrap occurrences of those names in [[slug|Name]].
+    Compile every linkable term in atomic_index into a single matcher, so a
+    block of text is scanned once rather than once per term.
 
-    - Sort terms by length desc to avoid partial overlaps.
+    - Sort terms by length desc so longer names win over their prefixes.
+    - Skip terms shorter than MIN_LINK_TERM_LENGTH chars.
     - Use word boundaries to reduce false positives.
+    - Match case-insensitively (index keys are folded).
+
+    Uses an Aho-Corasick automaton when pyahocorasick is installed (one
+    linear pass however many terms share prefixes), otherwise a regex
+    alternation. Returns None when no term qualifies.
     """
-    if not text or not atomic_index:
-        return text
+    terms = sorted(set(atomic_index.keys()), key=len, reverse=True)
+    terms = [t for t in terms if not t.isspace() and len(t) >= MIN_LINK_TERM_LENGTH]
+    if not terms:
+        return None
+
+    if ahocorasick is not None:
+        automaton = ahocorasick.Automaton()
+        for term in terms:
+            automaton.add_word(term, (len(term), term))
+        automaton.make_automaton()
+        return automaton
+
+    alternation = "|".join(re.escape(t) for t in terms)
+    return re.compile(r"\b(" + alternation + r")\b", re.IGNORECASE)
+
 
-    terms = list(atomic_index.keys())
-    terms = sorted(set(terms), key=len, reverse=True)
+def _is_word_char(c: str) -> bool:
+    return c.isalnum() or c == "_"
 
-    result = text
 
-    for term in terms:
-        if not term or term.isspace():
-            continue
-        if len(term) < 3:
-            # avoid turning every tiny word into a link
-            continue
+def _at_word_boundary(text: str, i: int) -> bool:
+    """Same test as regex `\\b` at position i of text."""
+    before = i > 0 and _is_word_char(text[i - 1])
+    after = i < len(text) and _is_word_char(text[i])
+    return before != after
 
-        slug = atomic_index[term]
-        escaped = re.escape(term)
-        pattern = r"\b(" + escaped + r")\b"
 
-        def repl(match):
-            word = match.group(1)
-            return f"[[{slug}|{word}]]"
+def _iter_term_matches(text: str, pattern):
+    """
+    Yield non-overlapping (start, end, key) hits of `pattern` in text, where
+    key is the folded atomic_index key. Hits are leftmost first and
+    longest at each position - the same hits the regex alternation produces.
+    """
+    if isinstance(pattern, re.Pattern):
+        for match in pattern.finditer(text):
+            yield match.start(1), match.end(1), _casefold_same_length(match.group(1))
+        return
+
+    hits = []
+    for last, (length, term) in pattern.iter(_casefold_same_length(text)):
+        start, end = last - length + 1, last + 1
+        if _at_word_boundary(text, start) and _at_word_boundary(text, end):
+            hits.append((start, -length, term))
+    hits.sort()
+
+    pos = 0
+    for start, neg_length, term in hits:
+        if start >= pos:
+            pos = start - neg_length
+            yield start, pos, term
+
+
+def make_linker(atomic_index: dict):
+    """
+    Return a function link(text) that wraps occurrences of the names in
+    atomic_index (name_or_id_or_related_term -> slug) in [[slug|Name]],
+    keeping the text's own casing for Name.
+
+    The matcher is compiled once here, so build one linker per chapter and
+    reuse it for every block. Text with no hits is returned as-is without
+    building any fragments.
+    """
+    pattern = compile_atomic_pattern(atomic_index)
+
+    def link(text: str) -> str:
+        if pattern is None or not text or len(text) < MIN_LINK_TERM_LENGTH:
+            return text
 
-        result = re.sub(pattern, repl, result)
+        parts = []
+        pos = 0
+        for start, end, key in _iter_term_matches(text, pattern):
+            slug = atomic_index.get(key)
+            if slug is None:
+                continue
+            parts.append(text[pos:start])
+            parts.append(f"[[{slug}|{text[start:end]}]]")
+            pos = end
+        if not parts:
+            return text
+        parts.append(text[pos:])
+        return "".join(parts)
 
-    return result
+    return link
 
 
-def render_chapter_md(data: dict, atomic_index: dict) -> str:
+def link_text_with_atomic_terms(text: str, atomic_index: dict) -> str:
+    """
+    One-off form of make_linker(atomic_index)(text). Prefer make_linker when
+    linking several blocks against the same index.
+    """
+    if not text or not atomic_index:
+        return text
+    return make_linker(atomic_index)(text)
+
+
+def _diagram_lines(diag: dict) -> list:
+    """Heading, description and code fence(s) for one diagram."""
+    lines = [f"## {diag['title']}", diag["description"], ""]
+    primary = diag.get("primary_format", "mermaid")
+    mermaid = diag.get("mermaid_code", "").strip()
+    ascii_art = diag.get("ascii_art", "").strip()
+
+    if primary == "mermaid" and mermaid:
+        lines += ["```mermaid", mermaid, "```"]
+    elif primary == "ascii" and ascii_art:
+        lines += ["```text", ascii_art, "```"]
+    else:
+        if mermaid:
+            lines += ["```mermaid", mermaid, "```"]
+        if ascii_art:
+            lines += ["```text", ascii_art, "```"]
+    lines.append("")
+    return lines
+
+
+def _section_md(sec: dict, link) -> str:
+    """One section: heading, summary, then its auto-linked bullet points."""
+    bullets = "".join(f"- {link(bp)}\n" for bp in sec.get("bullet_points", []))
+    return f"## {sec['title']}\n{sec['summary']}\n\n{bullets}"
+
+
+def render_chapter_md(data: dict, atomic_index: dict, link=None) -> str:
+    """`link` is make_linker(atomic_index); built here when not given."""
+    if link is None:
+        link = make_linker(atomic_index)
+
     book_id = data["book_id"]
     book_title = data["book_title"]
     ch_num = data["chapter_number"]
     ch_title = data["chapter_title"]
 
-    lines = []
-    lines.append("---")
-    lines.append(f'title: "{book_title} - Chapter {ch_num}: {ch_title}"')
-    lines.append(f"book_id: {book_id}")
-    lines.append(f"chapter_number: {ch_num}")
-    lines.append("tags:")
-    lines.append("  - textbook")
-    lines.append("  - technical")
-    lines.append("---")
-    lines.append("")
+    header = [
+        "---",
+        f'title: "{book_title} - Chapter {ch_num}: {ch_title}"',
+        f"book_id: {book_id}",
+        f"chapter_number: {ch_num}",
+        "tags:",
+        "  - textbook",
+        "  - technical",
+        "---",
+        "",
+    ]
 
     # Summary – clickable index
-    lines.append("# Summary")
-    summary = data["chapter_summary"]
-    linked_summary = link_text_with_atomic_terms(summary, atomic_index)
-    lines.append(linked_summary)
-    lines.append("")
+    summary = ["# Summary", link(data["chapter_summary"]), ""]
 
     # Key Ideas – auto-link
-    lines.append("# Key Ideas")
-    for idea in data.get("key_ideas", []):
-        linked_idea = link_text_with_atomic_terms(idea, atomic_index)
-        lines.append(f"- {linked_idea}")
-    lines.append("")
+    key_ideas = ["# Key Ideas"]
+    key_ideas += [f"- {link(idea)}" for idea in data.get("key_ideas", [])]
+    key_ideas.append("")
 
     # Key Terms – heading itself links to atomic if we can find a match
-    lines.append("# Key Terms")
+    key_terms = ["# Key Terms"]
     for term in data.get("key_terms", []):
         term_name = term["term"]
         # first try direct mapping (e.g., "CTO", "First 100 Days")
-        slug = atomic_index.get(term_name)
-        heading = term_name
-        if slug:
-            heading = f"[[{slug}|{term_name}]]"
-        lines.append(f"## {heading}")
-        lines.append(term["definition"])
-        lines.append("")
-    lines.append("")
+        slug = atomic_index.get(_casefold_same_length(term_name))
+        heading = f"[[{slug}|{term_name}]]" if slug else term_name
+        key_terms += [f"## {heading}", term["definition"], ""]
+    key_terms.append("")
 
     # Sections – we lightly auto-link section bullet points too
-    lines.append("# Sections")
-    for sec in data.get("sections", []):
-        lines.append(f"## {sec['title']}")
-        lines.append(sec["summary"])
-        lines.append("")
-        for bp in sec.get("bullet_points", []):
-            linked_bp = link_text_with_atomic_terms(bp, atomic_index)
-            lines.append(f"- {linked_bp}")
-        lines.append("")
-    lines.append("")
+    sections = ["# Sections"]
+    sections += [_section_md(sec, link) for sec in data.get("sections", [])]
+    sections.append("")
 
     # Diagrams (unchanged)
-    lines.append("# Diagrams")
+    diagrams = ["# Diagrams"]
     for diag in data.get("diagrams", []):
-        lines.append(f"## {diag['title']}")
-        lines.append(diag["description"])
-        lines.append("")
-        primary = diag.get("primary_format", "mermaid")
-        mermaid = diag.get("mermaid_code", "").strip()
-        ascii_art = diag.get("ascii_art", "").strip()
-
-        if primary == "mermaid" and mermaid:
-            lines.append("```mermaid")
-            lines.append(mermaid)
-            lines.append("```")
-        elif primary == "ascii" and ascii_art:
-            lines.append("```text")
-            lines.append(ascii_art)
-            lines.append("```")
-        else:
-            if mermaid:
-                lines.append("```mermaid")
-                lines.append(mermaid)
-                lines.append("```")
-            if ascii_art:
-                lines.append("```text")
-                lines.append(ascii_art)
-                lines.append("```")
-        lines.append("")
-    lines.append("")
+        diagrams += _diagram_lines(diag)
+    diagrams.append("")
 
     # Atomic Notes index – one link per atomic note
-    lines.append("# Atomic Notes (Index)")
-    for note in data.get("atomic_notes", []):
-        slug = sanitize_filename(note.get("id") or note.get("title", ""))
-        lines.append(f"- [[{slug}]]")
-    lines.append("")
+    atomic_links = ["# Atomic Notes (Index)"]
+    atomic_links += [
+        f"- [[{sanitize_filename(note.get('id') or note.get('title', ''))}]]"
+        for note in data.get("atomic_notes", [])
+    ]
+    atomic_links.append("")
 
-    return "\n".join(lines)
+    return "\n".join(
+        itertools.chain(
+            header, summary, key_ideas, key_terms, sections, diagrams, atomic_links
+        )
+    )
 
 
 def render_atomic_md(data: dict, note: dict, atomic_index: dict) -> str:
@@ -187,47 +315,60 @@ def render_atomic_md(data: dict, note: dict, atomic_index: dict) -> str:
     today = datetime.today().strftime("%Y-%m-%d")
     chapter_slug = f"ch{ch_num:02d}-{sanitize_filename(ch_title)}"
 
-    lines = []
-    lines.append("---")
-    lines.append(f'title: "{title}"')
-    lines.append(f"book_id: {book_id}")
-    lines.append(f"chapter_number: {ch_num}")
-    lines.append(f'origin_chapter_title: "{ch_title}"')
-    lines.append(f"note_id: {note_id}")
-    lines.append(f"created: {today}")
-    lines.append("tags:")
-    lines.append("  - textbook")
-    lines.append("  - atomic-note")
-    lines.append("---")
-    lines.append("")
-
-    lines.append("# Summary")
-    lines.append(summary)
-    lines.append("")
-
-    lines.append("# Details")
-    lines.append(details)
-    lines.append("")
+    lines = [
+        "---",
+        f'title: "{title}"',
+        f"book_id: {book_id}",
+        f"chapter_number: {ch_num}",
+        f'origin_chapter_title: "{ch_title}"',
+        f"note_id: {note_id}",
+        f"created: {today}",
+        "tags:",
+        "  - textbook",
+        "  - atomic-note",
+        "---",
+        "",
+        "# Summary",
+        summary,
+        "",
+        "# Details",
+        details,
+        "",
+    ]
 
     # Related Terms / Concepts – now link via the same index
     if related_terms:
         lines.append("# Related Terms / Concepts")
         for rt in related_terms:
-            slug = atomic_index.get(rt)
-            if slug:
-                lines.append(f"- [[{slug}|{rt}]]")
-            else:
-                lines.append(f"- {rt}")
+            slug = atomic_index.get(_casefold_same_length(rt))
+            lines.append(f"- [[{slug}|{rt}]]" if slug else f"- {rt}")
         lines.append("")
 
     # Backlink to chapter
-    lines.append("# Source")
-    lines.append(f"- [[{chapter_slug}]]")
-    lines.append("")
+    lines += ["# Source", f"- [[{chapter_slug}]]", ""]
 
     return "\n".join(lines)
 
 
+def write_atomic_note(
+    data: dict, note: dict, atomic_index: dict, atomic_dir: Path
+) -> Path:
+    """Render one atomic note and write it to atomic_dir; returns the path."""
+    fname = sanitize_filename(note.get("id") or note.get("title", "")) + ".md"
+    path = atomic_dir / fname
+    # Chapters rendered in parallel may write the same note: write a hidden
+    # temp file and rename it into place so the note is never left torn.
+    fd, tmp_path = tempfile.mkstemp(dir=atomic_dir, prefix=".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(render_atomic_md(data, note, atomic_index))
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+    return path
+
+
 def main():
     if len(sys.argv) < 3:
         print("Usage: render_markdown.py <book_id> <chapter_json_path>")
@@ -235,7 +376,7 @@ def main():
 
     book_id = sys.argv[1]
     json_path = Path(sys.argv[2])
-    data = json.loads(json_path.read_text(encoding="utf-8"))
+    data = load_json(json_path)
 
     out_base = Path("output") / book_id
     chapter_dir = out_base / "chapters"
@@ -245,21 +386,31 @@ def main():
 
     atomic_notes = data.get("atomic_notes", [])
     atomic_index = build_atomic_index(atomic_notes)
+    link = make_linker(atomic_index)
 
     # Chapter note
     ch_num = data["chapter_number"]
     ch_title = data["chapter_title"]
     chapter_fname = f"ch{ch_num:02d}-{sanitize_filename(ch_title)}.md"
-    chapter_md = render_chapter_md(data, atomic_index)
+    chapter_md = render_chapter_md(data, atomic_index, link)
     (chapter_dir / chapter_fname).write_text(chapter_md, encoding="utf-8")
     print(f"Wrote chapter note: {chapter_dir / chapter_fname}")
 
-    # Atomic notes
+    # Atomic notes – each is an independent render plus a small write, so
+    # fan them out over threads. atomic_index is read-only from here on.
+    # When several notes share a slug only the last one is written, which
+    # is the file a serial loop would have left behind.
+    by_fname = {}
     for note in atomic_notes:
-        fname = sanitize_filename(note.get("id") or note.get("title", "")) + ".md"
-        atomic_md = render_atomic_md(data, note, atomic_index)
-        (atomic_dir / fname).write_text(atomic_md, encoding="utf-8")
-        print(f"Wrote atomic note: {atomic_dir / fname}")
+        by_fname[sanitize_filename(note.get("id") or note.get("title", ""))] = note
+
+    with ThreadPoolExecutor(max_workers=8) as ex:
+        paths = ex.map(
+            lambda note: write_atomic_note(data, note, atomic_index, atomic_dir),
+            by_fname.values(),
+        )
+        for path in paths:
+            print(f"Wrote atomic note: {path}")
 
 
 if __name__ == "__main__":
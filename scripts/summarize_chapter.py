@@ -1,117 +1,542 @@
 #!/usr/bin/env python3
+import asyncio
+import functools
+import hashlib
 import json
+import multiprocessing as mp
+import os
+import random
 import sys
+import tempfile
 import time
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 
-import yaml
 from dotenv import load_dotenv
-from openai import OpenAI
-from openai import RateLimitError
+from openai import AsyncOpenAI, DefaultAsyncHttpxClient, DefaultHttpxClient, OpenAI
+from openai import (
+    APIConnectionError,
+    APITimeoutError,
+    InternalServerError,
+    RateLimitError,
+)
+
+try:
+    import h2
+except ImportError:
+    # Optional; without it httpx speaks HTTP/1.1 only.
+    h2 = None
+
+try:
+    import orjson
+except ImportError:
+    # Optional; responses and chapter files then go through stdlib json.
+    orjson = None
+
+try:
+    import tiktoken
+except ImportError:
+    # Optional; chapters are then cut by characters instead of tokens.
+    tiktoken = None
 
 # Load environment variables from .env file
 load_dotenv()
 
+SYSTEM_PROMPT = (
+    "You are a meticulous note-taking assistant. "
+    "You must use ONLY information explicitly present in the provided chapter text. "
+    'If a required field cannot be derived from the text, choose the most conservative, empty, or minimal valid value (e.g., empty arrays, "Untitled Chapter"). '
+    "Output ONLY a valid JSON object conforming exactly to the requested schema."
+)
+
+# Where chapter_prompt.txt takes the chapter text
+CHAPTER_TEXT_MARKER = "{{CHAPTER_TEXT}}"
+
+# Requests kept in flight in --manifest mode unless --max-in-flight is given
+DEFAULT_MAX_IN_FLIGHT = 8
+
+# Transient failures retried with backoff: rate limits, timeouts, dropped
+# connections and 5xx responses
+RETRYABLE_ERRORS = (
+    RateLimitError,
+    APITimeoutError,
+    APIConnectionError,
+    InternalServerError,
+)
+MAX_RETRIES = 5
+BASE_RETRY_DELAY = 5.0
+
+# Keys every chapter JSON must have
+_REQUIRED_FIELDS = frozenset(
+    {
+        "book_id",
+        "book_title",
+        "chapter_number",
+        "chapter_title",
+        "chapter_summary",
+        "key_ideas",
+        "key_terms",
+        "sections",
+        "diagrams",
+        "atomic_notes",
+    }
+)
+
+# Input budget per chapter; override with "max_input_tokens" in config.json
+DEFAULT_MAX_INPUT_TOKENS = 12_000
+
+# Character cut-off used when no tokenizer is available
+MAX_INPUT_CHARS = 40_000
+
+# Generous upper bound on characters per token (English averages about 4);
+# caps how much of a chapter file is read before token truncation
+MAX_CHARS_PER_TOKEN = 10
+
+# Model responses keyed by a hash of the full request; delete to force re-runs
+RESPONSE_CACHE_DIR = Path("intermediate") / ".cache"
 
+
+# Config and prompt never change during a run; parse them once per process.
+# Callers must treat the returned values as read-only.
+@functools.lru_cache(maxsize=1)
 def load_config():
-    cfg_path = Path("config.yaml")
+    cfg_path = Path("config.json")
     if cfg_path.exists():
-        return yaml.safe_load(cfg_path.read_text(encoding="utf-8"))
+        return json.loads(cfg_path.read_text(encoding="utf-8"))
     return {"default_model": "gpt-5.1-mini"}
 
 
-def load_prompt_template() -> str:
+@functools.lru_cache(maxsize=1)
+def load_prompt_parts() -> tuple[str, str]:
+    """The prompt template split at CHAPTER_TEXT_MARKER: (before, after)."""
     prompt_path = Path("prompts") / "chapter_prompt.txt"
-    return prompt_path.read_text(encoding="utf-8")
+    template = prompt_path.read_text(encoding="utf-8")
+    prefix, _, suffix = template.partition(CHAPTER_TEXT_MARKER)
+    return prefix, suffix
 
 
-def summarize_chapter(
-    book_id: str, book_title: str, chapter_number: int, chapter_path: Path
-):
+# One client per process, built on first use; its connection pool keeps
+# idle connections alive so later requests skip the TCP/TLS handshake.
+@functools.lru_cache(maxsize=1)
+def get_client() -> OpenAI:
+    return OpenAI(http_client=DefaultHttpxClient(http2=h2 is not None))
+
+
+@functools.lru_cache(maxsize=None)
+def get_encoding(model: str):
+    """The tiktoken encoding for model, built once; None if unavailable."""
+    if tiktoken is None:
+        return None
+    try:
+        try:
+            return tiktoken.encoding_for_model(model)
+        except KeyError:
+            return tiktoken.get_encoding("o200k_base")
+    except Exception as e:
+        # e.g. the encoding file cannot be downloaded
+        print(
+            f"⚠️  No tokenizer for {model} ({type(e).__name__}); cutting by characters"
+        )
+        return None
+
+
+def read_chapter_text(chapter_path: Path, model: str, max_tokens: int) -> str:
+    """
+    The chapter text cut to at most max_tokens model tokens (or MAX_INPUT_CHARS
+    characters without a tokenizer). Only a bounded prefix of the file is
+    read, so huge chapters never sit in memory whole.
+    """
+    encoding = get_encoding(model)
+    limit = MAX_INPUT_CHARS if encoding is None else max_tokens * MAX_CHARS_PER_TOKEN
+    with chapter_path.open("r", encoding="utf-8") as f:
+        text = f.read(limit)
+    if encoding is None:
+        return text
+    tokens = encoding.encode(text, disallowed_special=())
+    if len(tokens) <= max_tokens:
+        return text
+    return encoding.decode(tokens[:max_tokens])
+
+
+def build_request(chapter_path: Path) -> dict:
+    """Keyword arguments for chat.completions.create for one chapter."""
     config = load_config()
     model = config.get("default_model", "gpt-5.1-mini")
-    client = OpenAI()
+    max_tokens = config.get("max_input_tokens", DEFAULT_MAX_INPUT_TOKENS)
+
+    prefix, suffix = load_prompt_parts()
+    # Safeguard against extremely long chapters
+    chapter_text = read_chapter_text(chapter_path, model, max_tokens)
+
+    # The chapter text sits after the static template text, so the prompt
+    # prefix is identical for every chapter and can hit the API's prompt cache.
+    prompt = "".join((prefix, chapter_text, suffix))
+
+    return {
+        "model": model,
+        "response_format": {"type": "json_object"},
+        "messages": [
+            {"role": "system", "content": SYSTEM_PROMPT},
+            {"role": "user", "content": prompt},
+        ],
+        "temperature": 0,
+    }
+
+
+def request_cache_key(request: dict) -> str:
+    """
+    Content address of a request. Model, prompts and chapter text all feed
+    the hash, so editing any of them misses the cache.
+    """
+    payload = json.dumps(request, sort_keys=True).encode("utf-8")
+    return hashlib.sha256(payload).hexdigest()
+
+
+def load_cached_response(key: str) -> str | None:
+    try:
+        return (RESPONSE_CACHE_DIR / f"{key}.json").read_text(encoding="utf-8")
+    except FileNotFoundError:
+        return None
+
+
+def store_cached_response(key: str, content: str) -> None:
+    # Write to a temp file and rename it into place, so concurrent runs never
+    # see a half-written entry and a crash cannot leave a truncated one.
+    RESPONSE_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=RESPONSE_CACHE_DIR, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(content)
+        os.replace(tmp_path, RESPONSE_CACHE_DIR / f"{key}.json")
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
 
-    prompt_template = load_prompt_template()
-    chapter_text = chapter_path.read_text(encoding="utf-8")
 
-    # Basic safeguard against extremely long chapters
-    max_chars = 40_000
-    if len(chapter_text) > max_chars:
-        chapter_text = chapter_text[:max_chars]
+def discard_cached_response(key: str, chapter_number: int) -> None:
+    print(f"⚠️  Discarding unreadable cached response for chapter {chapter_number:02d}")
+    (RESPONSE_CACHE_DIR / f"{key}.json").unlink(missing_ok=True)
 
-    prompt = prompt_template.replace("{{CHAPTER_TEXT}}", chapter_text)
 
-    # Basic retry/backoff for rate limits
-    def call_with_backoff(max_retries: int = 5, base_delay: float = 5.0):
+def retry_delay(err: Exception, attempt: int) -> float:
+    """
+    Seconds to wait before retry number attempt + 1. The server's Retry-After
+    hint wins when present; otherwise full jitter, so concurrent requests that
+    failed together do not all retry together.
+    """
+    response = getattr(err, "response", None)
+    if response is not None:
+        try:
+            return max(0.0, float(response.headers["retry-after"]))
+        except (KeyError, ValueError):
+            # Missing, or given as an HTTP date
+            pass
+    return random.uniform(0, BASE_RETRY_DELAY * 2**attempt)
+
+
+def _delta_text(chunk) -> str:
+    # The final usage chunk of a stream may carry no choices
+    if not chunk.choices:
+        return ""
+    return chunk.choices[0].delta.content or ""
+
+
+def parse_response(
+    content: str, book_id: str, book_title: str, chapter_number: int
+) -> dict:
+    """Decode the model's JSON and stamp/validate the book fields."""
+    data = orjson.loads(content) if orjson is not None else json.loads(content)
+
+    # Enforce/override book_id, book_title, chapter_number
+    data["book_id"] = book_id
+    data["book_title"] = book_title
+    data["chapter_number"] = chapter_number
+
+    # Basic validation
+    missing = _REQUIRED_FIELDS - data.keys()
+    if missing:
+        raise ValueError(
+            f"Missing required fields in model output: {', '.join(sorted(missing))}"
+        )
+
+    return data
+
+
+def summarize_chapter(
+    book_id: str, book_title: str, chapter_number: int, chapter_path: Path
+):
+    request = build_request(chapter_path)
+    cache_key = request_cache_key(request)
+    content = load_cached_response(cache_key)
+    if content is not None:
+        try:
+            data = parse_response(content, book_id, book_title, chapter_number)
+        except ValueError:
+            discard_cached_response(cache_key, chapter_number)
+        else:
+            print(f"Using cached response for chapter {chapter_number:02d}")
+            return data
+
+    client = get_client()
+
+    # Retry/backoff for rate limits and transient API errors
+    def call_with_backoff(max_retries: int = MAX_RETRIES):
         for attempt in range(max_retries):
             try:
-                return client.chat.completions.create(
-                    model=model,
-                    response_format={"type": "json_object"},
-                    messages=[
-                        {
-                            "role": "system",
-                            "content": (
-                                "You are a meticulous note-taking assistant. "
-                                "You must use ONLY information explicitly present in the provided chapter text. "
-                                'If a required field cannot be derived from the text, choose the most conservative, empty, or minimal valid value (e.g., empty arrays, "Untitled Chapter"). '
-                                "Output ONLY a valid JSON object conforming exactly to the requested schema."
-                            ),
-                        },
-                        {
-                            "role": "user",
-                            "content": prompt,
-                        },
-                    ],
-                    temperature=0,
-                )
-            except RateLimitError:
+                stream = client.chat.completions.create(**request, stream=True)
+                return "".join(_delta_text(chunk) for chunk in stream)
+            except RETRYABLE_ERRORS as e:
                 if attempt == max_retries - 1:
                     raise
-                sleep_for = base_delay * (2**attempt) + (0.5 * attempt)
+                sleep_for = retry_delay(e, attempt)
                 print(
-                    f"Rate limit hit (attempt {attempt + 1}/{max_retries}). "
+                    f"{type(e).__name__} (attempt {attempt + 1}/{max_retries}). "
                     f"Sleeping {sleep_for:.1f}s then retrying..."
                 )
                 time.sleep(sleep_for)
 
-    response = call_with_backoff()
+    content = call_with_backoff()
+    data = parse_response(content, book_id, book_title, chapter_number)
+    # Only cache output that passed validation
+    store_cached_response(cache_key, content)
+    return data
 
-    content = response.choices[0].message.content
-    data = json.loads(content)
 
-    # Enforce/override book_id, book_title, chapter_number
-    data["book_id"] = book_id
-    data["book_title"] = book_title
-    data["chapter_number"] = int(chapter_number)
+async def summarize_chapter_async(
+    get_async_client,
+    pool: ProcessPoolExecutor,
+    book_id: str,
+    book_title: str,
+    chapter_number: int,
+    chapter_path: Path,
+) -> Path:
+    """
+    Async counterpart of summarize_chapter sharing one client, which
+    get_async_client() returns; it is only called on a cache miss. Parsing
+    and writing the result runs on `pool`, off the event loop; returns the
+    path of the written chapter JSON.
+    """
+    loop = asyncio.get_running_loop()
+    request = build_request(chapter_path)
+    cache_key = request_cache_key(request)
+    content = load_cached_response(cache_key)
+    if content is not None:
+        try:
+            out_path = await loop.run_in_executor(
+                pool, _finalize, content, book_id, book_title, chapter_number
+            )
+        except ValueError:
+            discard_cached_response(cache_key, chapter_number)
+        else:
+            print(f"Using cached response for chapter {chapter_number:02d}")
+            return out_path
 
-    # Basic validation
-    required_fields = [
-        "book_id",
-        "book_title",
-        "chapter_number",
-        "chapter_title",
-        "chapter_summary",
-        "key_ideas",
-        "key_terms",
-        "sections",
-        "diagrams",
-        "atomic_notes",
-    ]
-    for field in required_fields:
-        if field not in data:
-            raise ValueError(f"Missing required field in model output: {field}")
+    client = get_async_client()
+
+    # Retry/backoff for rate limits and transient API errors
+    max_retries = MAX_RETRIES
+    for attempt in range(max_retries):
+        try:
+            # Streaming yields to the loop on every chunk, so other chapters
+            # progress while this one is still being generated
+            stream = await client.chat.completions.create(**request, stream=True)
+            parts = [_delta_text(chunk) async for chunk in stream]
+            break
+        except RETRYABLE_ERRORS as e:
+            if attempt == max_retries - 1:
+                raise
+            sleep_for = retry_delay(e, attempt)
+            print(
+                f"{type(e).__name__} for chapter {chapter_number:02d} "
+                f"(attempt {attempt + 1}/{max_retries}). "
+                f"Sleeping {sleep_for:.1f}s then retrying..."
+            )
+            await asyncio.sleep(sleep_for)
+
+    content = "".join(parts)
+    return await loop.run_in_executor(
+        pool, _finalize, content, book_id, book_title, chapter_number, cache_key
+    )
+
+
+def write_chapter_json(data: dict) -> Path:
+    out_dir = Path("intermediate") / data["book_id"]
+    out_dir.mkdir(parents=True, exist_ok=True)
+    out_path = out_dir / f"chapter-{data['chapter_number']:0>2}.json"
+    if orjson is not None:
+        out_path.write_bytes(orjson.dumps(data, option=orjson.OPT_INDENT_2))
+    else:
+        out_path.write_text(json.dumps(data, indent=2), encoding="utf-8")
+    return out_path
 
-    return data
+
+def _finalize(
+    content: str,
+    book_id: str,
+    book_title: str,
+    chapter_number: int,
+    cache_key: str | None = None,
+) -> Path:
+    """
+    Parse, validate and write one chapter; runs in a worker process. The
+    response is cached under cache_key only once it has passed validation.
+    """
+    data = parse_response(content, book_id, book_title, chapter_number)
+    if cache_key is not None:
+        store_cached_response(cache_key, content)
+    return write_chapter_json(data)
+
+
+def load_manifest(manifest_path: Path) -> list[tuple[str, str, int, Path]]:
+    """
+    Read a manifest: a JSON list of objects with book_id, book_title,
+    chapter_number and chapter_path keys. Raises ValueError naming the
+    first bad entry.
+    """
+    entries = json.loads(manifest_path.read_text(encoding="utf-8"))
+    if not isinstance(entries, list):
+        raise ValueError("expected a JSON list of chapter objects")
+
+    chapters = []
+    for i, e in enumerate(entries, 1):
+        try:
+            chapters.append(
+                (
+                    e["book_id"],
+                    e["book_title"],
+                    int(e["chapter_number"]),
+                    Path(e["chapter_path"]),
+                )
+            )
+        except KeyError as err:
+            raise ValueError(f"entry {i} is missing {err}: {e!r}") from None
+        except (TypeError, ValueError) as err:
+            raise ValueError(f"entry {i} is invalid ({err}): {e!r}") from None
+    return chapters
+
+
+async def summarize_all(
+    chapters: list[tuple[str, str, int, Path]],
+    max_in_flight: int = DEFAULT_MAX_IN_FLIGHT,
+) -> list[tuple[str, int]]:
+    """
+    Summarize many chapters concurrently on one event loop.
+
+    A sliding window keeps at most `max_in_flight` requests running: as soon
+    as one finishes its JSON is written and the next chapter is started, so
+    sockets, memory and rate-limit pressure stay bounded however long the
+    list is. Parsing and writing finished chapters happens in a small
+    process pool so it never stalls dispatching the next requests.
+
+    Returns (book_id, chapter_number) for every chapter that failed.
+    """
+    remaining = iter(chapters)
+    pending = {}
+    failed = []
+
+    workers = max(1, min(max_in_flight, len(chapters), os.cpu_count() or 1))
+
+    # The client is made per run, on the first cache miss (so a fully cached
+    # run needs no credentials), and closed with the run: its connection pool
+    # belongs to the event loop it was created on.
+    client = None
+
+    def get_async_client() -> AsyncOpenAI:
+        nonlocal client
+        if client is None:
+            http_client = DefaultAsyncHttpxClient(http2=h2 is not None)
+            client = AsyncOpenAI(http_client=http_client)
+        return client
+
+    try:
+        # Spawn rather than fork: the event loop and HTTP client may already
+        # have threads running, and a forked child would inherit their locks.
+        with ProcessPoolExecutor(workers, mp_context=mp.get_context("spawn")) as pool:
+
+            def start_next() -> None:
+                chapter = next(remaining, None)
+                if chapter is not None:
+                    coro = summarize_chapter_async(get_async_client, pool, *chapter)
+                    pending[asyncio.create_task(coro)] = chapter
+
+            for _ in range(max_in_flight):
+                start_next()
+
+            while pending:
+                done, _ = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    book_id, _, chapter_number, _ = pending.pop(task)
+                    try:
+                        out_path = task.result()
+                    except Exception as e:
+                        print(f"❌ {book_id} chapter {chapter_number:02d}: {e}")
+                        failed.append((book_id, chapter_number))
+                    else:
+                        print(f"Wrote {out_path}")
+                    start_next()
+    finally:
+        if client is not None:
+            await client.close()
+
+    return failed
+
+
+def print_usage_and_exit():
+    print(
+        "Usage: summarize_chapter.py <book_id> <book_title> <chapter_number> <chapter_path>"
+    )
+    print("       summarize_chapter.py --manifest <manifest.json> [--max-in-flight N]")
+    sys.exit(1)
+
+
+def parse_manifest_args(args: list[str]) -> tuple[Path, int] | None:
+    """
+    Parse `--manifest FILE [--max-in-flight N]` (either order, `--flag=value`
+    also accepted). Returns None on a missing, unknown or malformed argument.
+    """
+    manifest_path = None
+    max_in_flight = DEFAULT_MAX_IN_FLIGHT
+    it = iter(args)
+    for arg in it:
+        flag, has_value, value = arg.partition("=")
+        if not has_value:
+            value = next(it, None)
+        if value is None:
+            return None
+        if flag == "--manifest":
+            manifest_path = Path(value)
+        elif flag == "--max-in-flight":
+            try:
+                max_in_flight = int(value)
+            except ValueError:
+                return None
+            if max_in_flight < 1:
+                return None
+        else:
+            return None
+    if manifest_path is None:
+        return None
+    return manifest_path, max_in_flight
 
 
 def main():
+    if any(arg.startswith("--") for arg in sys.argv[1:]):
+        parsed = parse_manifest_args(sys.argv[1:])
+        if parsed is None:
+            print_usage_and_exit()
+        manifest_path, max_in_flight = parsed
+        try:
+            chapters = load_manifest(manifest_path)
+        except (OSError, ValueError) as e:
+            print(f"❌ Cannot read manifest {manifest_path}: {e}")
+            sys.exit(1)
+        failed = asyncio.run(summarize_all(chapters, max_in_flight))
+        sys.exit(1 if failed else 0)
+
     if len(sys.argv) < 5:
-        print(
-            "Usage: summarize_chapter.py <book_id> <book_title> <chapter_number> <chapter_path>"
-        )
-        sys.exit(1)
+        print_usage_and_exit()
 
     book_id = sys.argv[1]
     book_title = sys.argv[2]
@@ -120,10 +545,7 @@ def main():
 
     data = summarize_chapter(book_id, book_title, chapter_number, chapter_path)
 
-    out_dir = Path("intermediate") / book_id
-    out_dir.mkdir(parents=True, exist_ok=True)
-    out_path = out_dir / f"chapter-{chapter_number:0>2}.json"
-    out_path.write_text(json.dumps(data, indent=2), encoding="utf-8")
+    out_path = write_chapter_json(data)
     print(f"Wrote {out_path}")
 
 